@@ -1,9 +1,24 @@
 import streamlit as st
 import requests
 import re
+import os
+import json
+import time
+import hashlib
+import functools
+import tempfile
+import threading
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlencode
+
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to the stdlib json module
+    orjson = None
 
 # --------------------------------------------------
 # 1. Page Configuration & Dark Theme CSS Injection
@@ -42,14 +57,16 @@ st.markdown(
         border: 1px solid #333740 !important;
         border-radius: 5px !important;
     }
-    .stButton > button {
+    .stButton > button,
+    .stFormSubmitButton > button {
         background-color: #e63946 !important;
         color: #ffffff !important;
         border: none !important;
         border-radius: 5px !important;
         padding: 8px 16px !important;
     }
-    .stButton > button:hover {
+    .stButton > button:hover,
+    .stFormSubmitButton > button:hover {
         background-color: #d62839 !important;
     }
     /* DataFrame/table styling */
@@ -64,32 +81,6 @@ st.markdown(
     .stDataFrame td {
         color: #e0e0e0 !important;
     }
-    /* HTML table rendered via to_html */
-    .clickable-table {
-        width: 100%;
-        border-collapse: collapse;
-        margin-top: 10px;
-    }
-    .clickable-table th, .clickable-table td {
-        border: 1px solid #333740;
-        padding: 8px;
-    }
-    .clickable-table th {
-        background-color: #1e2228;
-        color: #ffffff;
-        text-align: left;
-    }
-    .clickable-table td {
-        background-color: #1b1f23;
-        color: #e0e0e0;
-    }
-    .clickable-table a {
-        color: #1e90ff;
-        text-decoration: none;
-    }
-    .clickable-table a:hover {
-        text-decoration: underline;
-    }
     </style>
     """,
     unsafe_allow_html=True
@@ -99,187 +90,629 @@ st.markdown(
 # 2. Helper Functions
 # --------------------------------------------------
 
+# On-disk cache for YouTube API responses, keyed by endpoint + params
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "youtube")
+CHANNEL_TTL = 7 * 24 * 3600   # handle/username → channel ID lookups rarely change
+UPLOADS_TTL = 30 * 24 * 3600  # a channel's uploads playlist ID never changes
+PLAYLIST_TTL = 3600       # uploads playlist pages shift when new videos go up
+VIDEO_TTL = 3600          # video statistics drive the table, keep them fresh
+DURATION_TTL = 7 * 24 * 3600  # a published video's duration does not change
+
+# Expired entries are kept for ETag revalidation, but not forever: anything not
+# rewritten for CACHE_MAX_AGE is deleted, oldest files go past CACHE_MAX_FILES,
+# and the directory is swept at most once per CACHE_PRUNE_INTERVAL
+CACHE_MAX_AGE = 2 * UPLOADS_TTL
+CACHE_MAX_FILES = 5000
+CACHE_PRUNE_INTERVAL = 3600
+
+# (connect, read) timeouts in seconds, so a stalled call cannot hang the session
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Most API requests in flight at once across every browser session on this server
+MAX_CONCURRENT_REQUESTS = 8
+
+# Throttled / failed responses worth retrying, and how long to wait in between.
+# Retry-After is honoured but clamped, so a 429 cannot stall the session for long
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+MAX_STATUS_RETRIES = 3
+RETRY_BACKOFF = 0.3   # seconds, doubled per attempt
+MAX_RETRY_AFTER = 5   # seconds, upper bound on any single wait
+
+# Precompiled patterns for channel input and @handles. CHANNEL_INPUT_RE covers
+# every accepted form in one pass: a bare "UC…" ID or "@handle", or a URL whose
+# path is /channel/…, /user/…, /c/…, /@handle or a single custom-name segment
+# (anything after the first identifier, e.g. /videos or ?si=…, is ignored)
+CHANNEL_INPUT_RE = re.compile(r"""
+    ^(?:
+        (?P<id>UC[\w-]{22})
+      | @(?P<handle>[^/?\#\s]+)
+      | (?i:https?)://[^/?\#]+/+(?:
+            (?P<kind>(?i:channel|user|c))/+(?P<ident>[^/?\#]+)
+          | @(?P<url_handle>[^/?\#]+)
+          | (?P<url_id>UC[\w-]{22})(?![^/?\#])
+          | (?P<segment>[^/?\#]+)
+        )(?:[/?\#].*)?
+    )$
+""", re.VERBOSE)
+HANDLE_RE = re.compile(r"^@?[\w.-]{3,30}$")
+
+# Shared read-only fallback for missing response sub-objects (avoids a new {} per lookup)
+_EMPTY = {}
+
+# Watch URL for the table's link column, filled per row with str.format
+WATCH_URL = "https://www.youtube.com/watch?v={}"
+
+
+class YouTubeAPIError(Exception):
+    """
+    A YouTube API request failed (network error, timeout, or a non-200
+    response such as an exhausted quota). The memoized helpers raise this
+    instead of returning None, because st.cache_data never stores a raised
+    exception: a transient failure is retried on the next run rather than
+    being remembered as "not found".
+    """
+
+
+@st.cache_resource(show_spinner=False)
+def get_http_session() -> requests.Session:
+    """
+    One requests.Session per server process, so every API call (including
+    the prefetch thread) reuses pooled keep-alive connections to
+    googleapis.com instead of paying a new TCP/TLS handshake.
+    Connection errors are retried here with a short exponential backoff;
+    429/5xx responses are retried by cached_get_json, one attempt at a time.
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        allowed_methods=["GET"],
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    # The Session is shared by every browser session on this server, each of
+    # which may have several fetch workers in flight; size the pool so those
+    # connections are kept alive instead of being discarded when it fills up
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+    return session
+
+
+@st.cache_resource(show_spinner=False)
+def get_request_semaphore() -> threading.BoundedSemaphore:
+    """
+    Process-wide cap on concurrent API requests. Each session's fetch
+    workers share it with every other session's, so a busy server queues
+    calls here instead of bursting past the API's per-second rate limits.
+    """
+    return threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+
+def _json_loads(raw: bytes):
+    """
+    Decode JSON bytes with orjson when available, else stdlib json.
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _json_dumps(obj) -> bytes:
+    """
+    Encode an object to JSON bytes with orjson when available, else stdlib json.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _cache_path(url: str, params: dict = None) -> str:
+    """
+    Map a request to a cache file. The API key is left out of the key so
+    cached responses survive key rotation.
+    """
+    query = sorted((k, str(v)) for k, v in (params or {}).items() if k != "key")
+    key_material = url + "?" + urlencode(query)
+    digest = hashlib.sha256(key_material.encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.json")
+
+
+def _read_cache_entry(path: str):
+    """
+    Load a cached response entry, or None if it is missing or unreadable.
+    """
+    try:
+        with open(path, "rb") as f:
+            entry = _json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or "fetched_at" not in entry or "body" not in entry:
+        return None
+    return entry
+
+
+@st.cache_resource(ttl=CACHE_PRUNE_INTERVAL, show_spinner=False)
+def prune_disk_cache() -> int:
+    """
+    Delete cache files not rewritten within CACHE_MAX_AGE, leftover temp
+    files, and then the oldest entries beyond CACHE_MAX_FILES. Memoized
+    with a TTL, so calling it on every write sweeps the directory at most
+    once per CACHE_PRUNE_INTERVAL per process. Returns the number removed.
+    """
+    now = time.time()
+    entries, removed = [], 0
+    try:
+        with os.scandir(CACHE_DIR) as it:
+            for f in it:
+                try:
+                    mtime = f.stat().st_mtime
+                except OSError:
+                    continue
+                if f.name.endswith(".tmp"):
+                    stale = now - mtime > CACHE_PRUNE_INTERVAL
+                elif f.name.endswith(".json"):
+                    stale = now - mtime > CACHE_MAX_AGE
+                    if not stale:
+                        entries.append((mtime, f.path))
+                else:
+                    continue
+                if stale:
+                    try:
+                        os.remove(f.path)
+                        removed += 1
+                    except OSError:
+                        pass
+    except OSError:
+        return removed
+
+    if len(entries) > CACHE_MAX_FILES:
+        entries.sort()
+        for _, path in entries[:len(entries) - CACHE_MAX_FILES]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def _write_cache_entry(path: str, entry: dict):
+    """
+    Write a cache entry via a temp file + rename, so concurrent readers
+    never see a partially written file. A failed write removes its temp file.
+    """
+    prune_disk_cache()
+    tmp_path = None
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(_json_dumps(entry))
+        os.replace(tmp_path, path)
+    except OSError:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def _retry_delay(resp: requests.Response, attempt: int) -> float:
+    """
+    Seconds to wait before retrying a 429/5xx response: the server's
+    Retry-After when it is a number of seconds, else exponential backoff.
+    Either way the wait is capped at MAX_RETRY_AFTER.
+    """
+    try:
+        delay = float(resp.headers.get("Retry-After", ""))
+    except ValueError:
+        delay = RETRY_BACKOFF * (2 ** attempt)
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+
+def cached_get_json(url: str, params: dict = None, ttl: int = 3600, refresh: bool = False):
+    """
+    GET a YouTube API URL and return the decoded JSON body, or None on a
+    non-200 response or network error. Successful responses are written to CACHE_DIR and
+    reused for `ttl` seconds; refresh=True skips the cached copy.
+    Once an entry expires it is revalidated with If-None-Match, so an
+    unchanged resource comes back as an empty 304 and keeps its body.
+    429/5xx responses are retried up to MAX_STATUS_RETRIES times.
+    """
+    path = _cache_path(url, params)
+    entry = None if refresh else _read_cache_entry(path)
+    if entry is not None and time.time() - entry["fetched_at"] < ttl:
+        return entry["body"]
+
+    headers = {}
+    if entry is not None and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+
+    session = get_http_session()
+    for attempt in range(MAX_STATUS_RETRIES + 1):
+        try:
+            # The semaphore covers a single attempt; the backoff sleep below runs
+            # outside it, so a throttled call never holds a slot while waiting
+            with get_request_semaphore():
+                resp = session.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+        except requests.RequestException:
+            return None
+        if resp.status_code not in RETRY_STATUSES or attempt == MAX_STATUS_RETRIES:
+            break
+        time.sleep(_retry_delay(resp, attempt))
+
+    if resp.status_code == 304 and entry is not None:
+        body, etag = entry["body"], entry["etag"]
+    elif resp.status_code == 200:
+        body, etag = _json_loads(resp.content), resp.headers.get("ETag")
+    else:
+        return None
+
+    _write_cache_entry(path, {"fetched_at": time.time(), "etag": etag, "body": body})
+    return body
+
+
 def extract_channel_identifier(url_or_id: str):
     """
     Determine channel identifier mode:
       - "id"       → literal channel ID (starts with "UC")
       - "username" → YouTube username (for /user/…)
       - "custom"   → custom URL handle (for /c/…)
+      - "handle"   → @handle (for /@… URLs or "@name" input), without the "@"
       - "raw"      → try as username then search
+    The input is classified with a single CHANNEL_INPUT_RE match.
     Returns (mode, identifier).
+
+    >>> extract_channel_identifier("UC_x5XG1OV2P6uZZ5FSM9Ttw")
+    ('id', 'UC_x5XG1OV2P6uZZ5FSM9Ttw')
+    >>> extract_channel_identifier("https://www.youtube.com/channel/UCBJycsmduvYEL83R_U4JriQ")
+    ('id', 'UCBJycsmduvYEL83R_U4JriQ')
+    >>> extract_channel_identifier("https://youtube.com/UCBJycsmduvYEL83R_U4JriQ?si=abc")
+    ('id', 'UCBJycsmduvYEL83R_U4JriQ')
+    >>> extract_channel_identifier("https://www.youtube.com/user/GoogleDevelopers")
+    ('username', 'GoogleDevelopers')
+    >>> extract_channel_identifier("https://www.youtube.com/c/ChannelName/videos")
+    ('custom', 'ChannelName')
+    >>> extract_channel_identifier("https://www.youtube.com/ChannelName")
+    ('custom', 'ChannelName')
+    >>> extract_channel_identifier("https://www.youtube.com/@mkbhd/shorts")
+    ('handle', 'mkbhd')
+    >>> extract_channel_identifier("https://www.youtube.com/@%E3%81%82")
+    ('handle', 'あ')
+    >>> extract_channel_identifier(" @mkbhd ")
+    ('handle', 'mkbhd')
+    >>> extract_channel_identifier("GoogleDevelopers")
+    ('raw', 'GoogleDevelopers')
+    >>> extract_channel_identifier("https://www.youtube.com/")
+    ('raw', 'https://www.youtube.com/')
     """
     text = url_or_id.strip()
-    if re.match(r"^UC[\w-]{21}$", text):
-        return ("id", text)
-
-    if text.startswith(("http://", "https://")):
-        parsed = urlparse(text)
-        parts = parsed.path.strip("/").split("/")
-        if len(parts) >= 2:
-            prefix, ident = parts[0].lower(), parts[1]
-            if prefix == "channel":
-                return ("id", ident)
-            if prefix == "user":
-                return ("username", ident)
-            if prefix == "c":
-                return ("custom", ident)
-        fallback = parts[-1]
-        if fallback:
-            if fallback.startswith("UC") and re.match(r"^UC[\w-]{21}$", fallback):
-                return ("id", fallback)
-            return ("custom", fallback)
-
-    if text.startswith("UC") and re.match(r"^UC[\w-]{21}$", text):
-        return ("id", text)
-    return ("raw", text)
-
-
+    match = CHANNEL_INPUT_RE.match(text)
+    if match is None:
+        return ("raw", text)
+
+    groups = match.groupdict()
+    if groups["id"] or groups["url_id"]:
+        return ("id", groups["id"] or groups["url_id"])
+    # Path segments copied from a browser are percent-encoded for non-ASCII
+    # names (/@%E3%81%82); decode them so requests doesn't encode them twice
+    if groups["handle"] or groups["url_handle"]:
+        return ("handle", unquote(groups["handle"] or groups["url_handle"]))
+    if groups["kind"]:
+        mode = {"channel": "id", "user": "username", "c": "custom"}[groups["kind"].lower()]
+        return (mode, unquote(groups["ident"]))
+    return ("custom", unquote(groups["segment"]))
+
+
+@functools.lru_cache(maxsize=4096)
 def parse_iso_duration_to_seconds(duration_iso: str) -> int:
     """
     Convert ISO 8601 duration (e.g. "PT1M23S", "PT45S") into total seconds.
+    YouTube durations are strictly PT[nH][nM][nS], so a str.partition scan
+    replaces the regex. Memoized: Shorts durations repeat heavily.
+    Anything unparseable (e.g. "PT1.5S") returns 0, as the regex did.
     """
-    match = re.match(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?", duration_iso)
-    if not match:
+    if not duration_iso.startswith("PT"):
         return 0
-    hours = int(match.group(1) or 0)
-    minutes = int(match.group(2) or 0)
-    seconds = int(match.group(3) or 0)
-    return hours * 3600 + minutes * 60 + seconds
+    rest = duration_iso[2:]
+    total = 0
+
+    try:
+        hours, sep, tail = rest.partition("H")
+        if sep:
+            total += int(hours) * 3600
+            rest = tail
+
+        minutes, sep, tail = rest.partition("M")
+        if sep:
+            total += int(minutes) * 60
+            rest = tail
+
+        seconds, sep, _ = rest.partition("S")
+        if sep:
+            total += int(seconds)
+    except ValueError:
+        return 0
+    return total
 
 
-def resolve_channel_id(api_key: str, mode: str, identifier: str) -> str:
+@st.cache_data(ttl=86400, show_spinner=False)
+def resolve_channel_id(_api_key: str, mode: str, identifier: str, refresh: bool = False) -> str:
     """
     Resolve to a literal channel ID ("UC…") using:
       - mode == "id"       → return as-is
-      - mode == "username" → channels?forUsername=…
-      - mode == "custom"   → search?q=…
-      - mode == "raw"      → try username, else search
+      - mode == "username" → channels?forUsername=…, then forHandle, then search
+      - mode == "custom"   → channels?forHandle=…, then search?q=…
+      - mode == "handle"   → channels?forHandle=@…, then search?q=…
+      - mode == "raw"      → try username, then handle, else search
+    channels.list costs 1 quota unit and search.list 100, so search only runs
+    once the cheap lookups came back empty. If a lookup fails outright (e.g.
+    quota exhausted) we raise YouTubeAPIError instead of escalating to the
+    pricier call. None (memoized) means every request succeeded and no
+    channel matched.
     """
     base = "https://www.googleapis.com/youtube/v3"
 
     if mode == "id":
         return identifier
 
-    if mode == "username":
-        url = f"{base}/channels?part=id&forUsername={identifier}&key={api_key}"
-        resp = requests.get(url)
-        if resp.status_code == 200:
-            items = resp.json().get("items", [])
-            if items:
-                return items[0]["id"]
-        mode = "custom"
-
-    if mode in ("custom", "raw"):
-        url = f"{base}/search?part=snippet&type=channel&q={identifier}&maxResults=1&key={api_key}"
-        resp = requests.get(url)
-        if resp.status_code == 200:
-            items = resp.json().get("items", [])
-            if items:
-                return items[0]["snippet"]["channelId"]
+    lookups = []
+    if mode in ("username", "raw"):
+        lookups.append(("forUsername", identifier))
+    if mode == "handle" or HANDLE_RE.match(identifier):
+        lookups.append(("forHandle", "@" + identifier.lstrip("@")))
+
+    for filter_name, value in lookups:
+        params = {
+            "part": "id",
+            filter_name: value,
+            "fields": "items/id",
+            "key": _api_key
+        }
+        data = cached_get_json(f"{base}/channels", params=params, ttl=CHANNEL_TTL, refresh=refresh)
+        if data is None:
+            raise YouTubeAPIError(f"channels.list ({filter_name}) request failed")
+        items = data.get("items", [])
+        if items:
+            return items[0]["id"]
+
+    params = {
+        "part": "snippet",
+        "type": "channel",
+        "q": identifier,
+        "maxResults": 1,
+        "fields": "items/snippet/channelId",
+        "key": _api_key
+    }
+    data = cached_get_json(f"{base}/search", params=params, ttl=CHANNEL_TTL, refresh=refresh)
+    if data is None:
+        raise YouTubeAPIError("search.list request failed")
+    items = data.get("items", [])
+    if items:
+        return items[0]["snippet"]["channelId"]
 
     return None
 
 
-def fetch_uploads_playlist_id(api_key: str, channel_id: str) -> str:
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_uploads_playlist_id(_api_key: str, channel_id: str, refresh: bool = False) -> str:
     """
     Given a channel ID, fetch the "uploads" playlist ID from contentDetails.
+    Raises YouTubeAPIError if the request fails, so only a genuine "no such
+    channel" (None) is memoized.
     """
-    url = (
-        f"https://www.googleapis.com/youtube/v3/channels"
-        f"?part=contentDetails&id={channel_id}&key={api_key}"
+    params = {
+        "part": "contentDetails",
+        "id": channel_id,
+        "fields": "items/contentDetails/relatedPlaylists/uploads",
+        "key": _api_key
+    }
+    data = cached_get_json(
+        "https://www.googleapis.com/youtube/v3/channels",
+        params=params, ttl=UPLOADS_TTL, refresh=refresh
     )
-    resp = requests.get(url)
-    if resp.status_code != 200:
-        return None
-    items = resp.json().get("items", [])
+    if data is None:
+        raise YouTubeAPIError("channels.list (contentDetails) request failed")
+    items = data.get("items", [])
     if not items:
         return None
     return items[0]["contentDetails"]["relatedPlaylists"]["uploads"]
 
 
-def fetch_videos_under_2_min(api_key: str, uploads_playlist_id: str, max_results: int = 40):
+def fetch_playlist_page(api_key: str, uploads_playlist_id: str, page_token: str = None,
+                        refresh: bool = False):
     """
-    Paginate through the uploads playlist, fetch video details in batches,
-    filter by duration < 120 seconds, and collect up to max_results videos.
-    Returns a list of dicts:
-      { "Video Title", "Views", "Likes", "Comments", "Engagement Rate", "Upload Date", "Video Link" }
+    Fetch one page (up to 50 items) of the uploads playlist.
+    Returns the decoded JSON response, or None on a non-200 response.
     """
-    collected = []
-    playlist_url = "https://www.googleapis.com/youtube/v3/playlistItems"
-    videos_url = "https://www.googleapis.com/youtube/v3/videos"
-    next_token = None
+    params = {
+        "part": "contentDetails",
+        "playlistId": uploads_playlist_id,
+        "maxResults": 50,
+        "fields": "items/contentDetails/videoId,nextPageToken",
+        "key": api_key
+    }
+    if page_token:
+        params["pageToken"] = page_token
 
-    while len(collected) < max_results:
-        params = {
-            "part": "contentDetails",
-            "playlistId": uploads_playlist_id,
-            "maxResults": 50,
-            "key": api_key
-        }
-        if next_token:
-            params["pageToken"] = next_token
+    return cached_get_json(
+        "https://www.googleapis.com/youtube/v3/playlistItems",
+        params=params, ttl=PLAYLIST_TTL, refresh=refresh
+    )
 
-        resp = requests.get(playlist_url, params=params)
-        if resp.status_code != 200:
-            break
-        data = resp.json()
-        items = data.get("items", [])
-        if not items:
-            break
 
-        batch_ids = [it["contentDetails"]["videoId"] for it in items]
-        if not batch_ids:
-            break
+def fetch_video_durations(api_key: str, video_ids: list, refresh: bool = False):
+    """
+    Fetch only contentDetails.duration for up to 50 video IDs. This is the
+    cheap first pass used to find Shorts before requesting their stats.
+    Returns the response items, or None on a failed request.
+    """
+    params = {
+        "part": "contentDetails",
+        "id": ",".join(video_ids),
+        "fields": "items(id,contentDetails/duration)",
+        "key": api_key
+    }
+    data = cached_get_json(
+        "https://www.googleapis.com/youtube/v3/videos",
+        params=params, ttl=DURATION_TTL, refresh=refresh
+    )
+    if data is None:
+        return None
+    return data.get("items", [])
 
-        vid_params = {
-            "part": "snippet,statistics,contentDetails",
-            "id": ",".join(batch_ids),
-            "key": api_key
-        }
-        vid_resp = requests.get(videos_url, params=vid_params)
-        if vid_resp.status_code != 200:
-            break
-        vdata = vid_resp.json().get("items", [])
 
-        for vid in vdata:
-            if len(collected) >= max_results:
+def fetch_video_details(api_key: str, video_ids: list, refresh: bool = False):
+    """
+    Fetch title, publish date and statistics for up to 50 video IDs.
+    Returns the response items, or None on a failed request.
+    """
+    params = {
+        "part": "snippet,statistics",
+        "id": ",".join(video_ids),
+        "fields": "items(id,snippet(title,publishedAt),statistics(viewCount,likeCount,commentCount))",
+        "key": api_key
+    }
+    data = cached_get_json(
+        "https://www.googleapis.com/youtube/v3/videos",
+        params=params, ttl=VIDEO_TTL, refresh=refresh
+    )
+    if data is None:
+        return None
+    return data.get("items", [])
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_videos_under_2_min(_api_key: str, uploads_playlist_id: str, max_results: int = 40,
+                             refresh: bool = False):
+    """
+    Find up to max_results videos under 120 seconds in the uploads playlist,
+    in two phases:
+      1. Page through the playlist (prefetching the next page in the
+         background) and look up only each page's durations, stopping once
+         enough Shorts are found, max_results * 5 uploads were scanned, or
+         3 pages in a row had no Shorts.
+      2. Fetch snippet + statistics for just those Shorts, 50 IDs per call,
+         with the calls issued concurrently.
+    Results are memoized in-process for 10 minutes across reruns; the
+    leading underscore keeps the API key out of Streamlit's cache key.
+    Any failed request raises YouTubeAPIError, so a partial scan is never
+    memoized (or shown) as the channel's full result.
+    Returns a DataFrame with columns:
+      "Video Title", "Views", "Likes", "Comments", "Engagement Rate", "Upload Date", "Video Link"
+    where the counts and the engagement rate (a percentage) stay numeric;
+    formatting is left to the display layer.
+    """
+    short_ids = []
+    seen_ids = set()
+    scan_limit = max_results * 5
+    pages_without_shorts = 0
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        page_future = executor.submit(
+            fetch_playlist_page, _api_key, uploads_playlist_id, None, refresh
+        )
+
+        while page_future is not None and len(short_ids) < max_results and len(seen_ids) < scan_limit:
+            data = page_future.result()
+            if data is None:
+                raise YouTubeAPIError("playlistItems.list request failed")
+            items = data.get("items", [])
+            if not items:
                 break
 
-            duration = parse_iso_duration_to_seconds(vid["contentDetails"]["duration"])
-            if duration < 120:
-                snippet = vid["snippet"]
-                title = snippet.get("title", "—")
-                published_at = snippet.get("publishedAt", "")
-                # Convert ISO timestamp to YYYY-MM-DD
-                try:
-                    upload_date = datetime.fromisoformat(published_at.replace("Z", "+00:00")).date().isoformat()
-                except:
-                    upload_date = published_at[:10] if published_at else ""
-
-                stats = vid.get("statistics", {})
-                views = int(stats.get("viewCount", 0))
-                likes = int(stats.get("likeCount", 0))
-                comments = int(stats.get("commentCount", 0))
-                engagement = 0.0
-                if views > 0:
-                    engagement = (likes + comments) / views * 100
-
-                link = f"https://www.youtube.com/watch?v={vid['id']}"
-                collected.append({
-                    "Video Title": title,
-                    "Views": f"{views:,}",
-                    "Likes": f"{likes:,}",
-                    "Comments": f"{comments:,}",
-                    "Engagement Rate": f"{engagement:.2f}%",
-                    "Upload Date": upload_date,
-                    "Video Link": f'<a href="{link}" target="_blank">Watch</a>'
-                })
-
-        next_token = data.get("nextPageToken")
-        if not next_token:
-            break
+            # Prefetch the next page while this page's durations are in flight
+            next_token = data.get("nextPageToken")
+            page_future = None
+            if next_token:
+                page_future = executor.submit(
+                    fetch_playlist_page, _api_key, uploads_playlist_id, next_token, refresh
+                )
+
+            # A new upload landing mid-scan shifts the playlist by one, so the
+            # next page can repeat IDs we already have; drop them in one pass
+            batch_ids = [
+                vid_id for vid_id in dict.fromkeys(it["contentDetails"]["videoId"] for it in items)
+                if vid_id not in seen_ids
+            ]
+            if not batch_ids:
+                continue
+            seen_ids.update(batch_ids)
+
+            duration_items = fetch_video_durations(_api_key, batch_ids, refresh)
+            if duration_items is None:
+                if page_future is not None:
+                    page_future.cancel()
+                raise YouTubeAPIError("videos.list (contentDetails) request failed")
+
+            # Filter the whole page on duration at once
+            durations = np.fromiter(
+                (parse_iso_duration_to_seconds(vid["contentDetails"]["duration"]) for vid in duration_items),
+                dtype=np.int64, count=len(duration_items)
+            )
+            hits = np.flatnonzero(durations < 120)[:max_results - len(short_ids)].tolist()
+            for i in hits:
+                short_ids.append(duration_items[i]["id"])
+
+            # Long-form-heavy channel: stop after 3 straight pages without a Short
+            pages_without_shorts = 0 if hits else pages_without_shorts + 1
+            if pages_without_shorts >= 3:
+                break
+
+        if page_future is not None:
+            page_future.cancel()
+
+        detail_futures = [
+            executor.submit(fetch_video_details, _api_key, short_ids[i:i + 50], refresh)
+            for i in range(0, len(short_ids), 50)
+        ]
+        details = {}
+        for future in detail_futures:
+            detail_items = future.result()
+            if detail_items is None:
+                raise YouTubeAPIError("videos.list (snippet,statistics) request failed")
+            for vid in detail_items:
+                details[vid["id"]] = vid
+
+    # Collected column-wise (one list per field) and turned into a DataFrame at the end
+    video_ids, titles, published = [], [], []
+    views, likes, comments = [], [], []
+    for vid_id in short_ids:
+        vid = details.get(vid_id)
+        if vid is None:
+            continue
+        snippet = vid.get("snippet") or _EMPTY
+        stats = vid.get("statistics") or _EMPTY
+        video_ids.append(vid_id)
+        titles.append(snippet.get("title", "—"))
+        published.append(snippet.get("publishedAt"))
+        views.append(int(stats.get("viewCount", 0)))
+        likes.append(int(stats.get("likeCount", 0)))
+        comments.append(int(stats.get("commentCount", 0)))
+
+    # Numeric work runs once over whole columns rather than per video
+    views_arr = np.array(views, dtype=np.int64)
+    interactions = np.array(likes, dtype=np.int64) + np.array(comments, dtype=np.int64)
+    engagement = np.divide(
+        interactions * 100.0, views_arr,
+        out=np.zeros(len(views_arr)), where=views_arr > 0
+    )
 
-    return collected[:max_results]
+    # ISO timestamps → YYYY-MM-DD in one pass; unparseable values become ""
+    upload_dates = (
+        pd.to_datetime(pd.Series(published, dtype=object), format="ISO8601", utc=True, errors="coerce")
+        .dt.strftime("%Y-%m-%d")
+        .fillna("")
+    )
+
+    return pd.DataFrame({
+        "Video Title": titles,
+        "Views": views_arr,
+        "Likes": likes,
+        "Comments": comments,
+        "Engagement Rate": engagement,
+        "Upload Date": upload_dates.to_numpy(),
+        "Video Link": [WATCH_URL.format(vid_id) for vid_id in video_ids],
+    })
 
 
 # --------------------------------------------------
@@ -306,18 +739,8 @@ with left_col:
     """)
     st.markdown('</div>', unsafe_allow_html=True)
 
-with right_col:
-    st.markdown('<div class="input-panel">', unsafe_allow_html=True)
-    st.header("🔍 Find Shorts")
-    channel_input = st.text_input(
-        label="Channel URL / ID / Username",
-        placeholder="e.g. https://www.youtube.com/c/ChannelName"
-    )
-    fetch_button = st.button("Fetch Videos", use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
-
 # --------------------------------------------------
-# 4. On Fetch: Resolve → Fetch → Display Table
+# 4. Fetch Panel: Resolve → Fetch → Display Table
 # --------------------------------------------------
 
 # Retrieve API key from secrets
@@ -330,42 +753,92 @@ if not api_key:
     st.error("🔒 Missing `youtube_api_key` in Streamlit secrets. Add it and rerun.")
     st.stop()
 
-if fetch_button:
-    if not channel_input.strip():
-        st.error("Please enter a channel URL, ID, or username.")
-    else:
-        with st.spinner("Resolving Channel ID…"):
-            mode, identifier = extract_channel_identifier(channel_input)
-            channel_id = resolve_channel_id(api_key, mode, identifier)
 
-        if not channel_id:
-            st.error("❌ Could not resolve a valid Channel ID. Check your input.")
+@st.fragment
+def fetch_panel():
+    """
+    Input form plus results. As a fragment, submitting the form reruns only
+    this function, not the CSS block, left panel or secrets lookup.
+    """
+    st.markdown('<div class="input-panel">', unsafe_allow_html=True)
+    st.header("🔍 Find Shorts")
+    # A form batches the inputs, so editing them doesn't rerun the script;
+    # only the submit button does
+    with st.form("channel_form", border=False):
+        channel_input = st.text_input(
+            label="Channel URL / ID / Username",
+            placeholder="e.g. https://www.youtube.com/c/ChannelName"
+        )
+        force_refresh = st.checkbox("Force refresh (bypass cached API responses)")
+        fetch_button = st.form_submit_button("Fetch Videos", width="stretch")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    if fetch_button:
+        if not channel_input.strip():
+            st.error("Please enter a channel URL, ID, or username.")
         else:
-            with st.spinner("Fetching Uploads Playlist…"):
-                uploads_playlist_id = fetch_uploads_playlist_id(api_key, channel_id)
+            # Failed requests surface as YouTubeAPIError from any stage below
+            try:
+                # A forced fetch drops only this input's refresh=True memo entries
+                # (refresh is part of the key), each stage once its arguments are
+                # known, so other visitors' cached channels are left alone
+                with st.spinner("Resolving Channel ID…"):
+                    mode, identifier = extract_channel_identifier(channel_input)
+                    if force_refresh:
+                        resolve_channel_id.clear(api_key, mode, identifier, refresh=True)
+                    channel_id = resolve_channel_id(api_key, mode, identifier, refresh=force_refresh)
+
+                if not channel_id:
+                    st.error("❌ Could not resolve a valid Channel ID. Check your input.")
+                else:
+                    with st.spinner("Fetching Uploads Playlist…"):
+                        if force_refresh:
+                            fetch_uploads_playlist_id.clear(api_key, channel_id, refresh=True)
+                        uploads_playlist_id = fetch_uploads_playlist_id(api_key, channel_id, refresh=force_refresh)
+
+                    if not uploads_playlist_id:
+                        st.error("❌ Unable to find uploads playlist for this channel.")
+                    else:
+                        with st.spinner("Scanning for recent videos under 2 minutes…"):
+                            if force_refresh:
+                                fetch_videos_under_2_min.clear(
+                                    api_key, uploads_playlist_id, max_results=40, refresh=True
+                                )
+                            videos_df = fetch_videos_under_2_min(
+                                api_key, uploads_playlist_id, max_results=40, refresh=force_refresh
+                            )
+
+                        if videos_df.empty:
+                            st.warning("No videos under 2 minutes found for this channel.")
+                        else:
+                            st.success(f"Found {len(videos_df)} videos under 2 minutes.")
+
+                            avg_eng = videos_df["Engagement Rate"].mean()
+                            avg_views = videos_df["Views"].mean()
+
+                            st.markdown(
+                                f"## **Average Engagement Rate: {avg_eng:.2f}%**\n\n"
+                                f"## **Average Views: {avg_views:,.0f}**"
+                            )
+
+                            # Arrow-backed grid: virtualized rows, sorting and CSV export
+                            # in the browser. Numbers ship as native Arrow ints/floats and
+                            # are formatted client-side, so they still sort numerically
+                            st.dataframe(
+                                videos_df,
+                                column_config={
+                                    "Views": st.column_config.NumberColumn("Views", format="%,d"),
+                                    "Likes": st.column_config.NumberColumn("Likes", format="%,d"),
+                                    "Comments": st.column_config.NumberColumn("Comments", format="%,d"),
+                                    "Engagement Rate": st.column_config.NumberColumn("Engagement Rate", format="%.2f%%"),
+                                    "Video Link": st.column_config.LinkColumn("Video Link", display_text="Watch"),
+                                },
+                                hide_index=True,
+                                width="stretch",
+                            )
+            except YouTubeAPIError:
+                st.error("❌ The YouTube API request failed (network error or quota). Try again shortly.")
 
-            if not uploads_playlist_id:
-                st.error("❌ Unable to find uploads playlist for this channel.")
-            else:
-                with st.spinner("Scanning for recent videos under 2 minutes…"):
-                    videos_data = fetch_videos_under_2_min(api_key, uploads_playlist_id, max_results=40)
 
-                if not videos_data:
-                    st.warning("No videos under 2 minutes found for this channel.")
-                else:
-                    st.success(f"Found {len(videos_data)} videos under 2 minutes.")
-                    df = pd.DataFrame(videos_data)
-
-                    # Calculate and display average engagement rate
-                    eng_rates = [float(item["Engagement Rate"].strip("%")) for item in videos_data]
-                    avg_eng = sum(eng_rates) / len(eng_rates) if eng_rates else 0.0
-                    st.markdown(f"## **Average Engagement Rate: {avg_eng:.2f}%**")
-
-                    # Calculate and display average views
-                    view_counts = [int(item["Views"].replace(",", "")) for item in videos_data]
-                    avg_views = sum(view_counts) / len(view_counts) if view_counts else 0.0
-                    st.markdown(f"## **Average Views: {avg_views:,.0f}**")
-
-                    # Convert DataFrame to HTML with clickable links and display
-                    html_table = df.to_html(escape=False, index=False, classes="clickable-table")
-                    st.write(html_table, unsafe_allow_html=True)
+with right_col:
+    fetch_panel()